@@ -11,7 +11,6 @@ const groq = new Groq({ apiKey: process.env.GROQ_API_KEY });
 const rateLimit = require('express-rate-limit');
 const path = require('path');
 const fs = require('fs');
-const { spawn } = require('child_process');
 const { buildDocumentTree, getNavigationMap, getDocumentStats } = require('./utils/structureParser');
 const { splitPdfToImages, cleanupPageImages, getPdfInfo } = require('./utils/pdfProcessor');
 const { analyzeDocument } = require('./utils/reasoningAgent');
@@ -107,141 +106,12 @@ const connectDB = async () => {
 // Connect to database
 connectDB();
 
-// Helper function to run Python preprocessing
-const runPreprocessing = (imagePath) => {
-  return new Promise((resolve, reject) => {
-    // Get absolute path to the Python script in utils folder
-    const scriptPath = path.join(__dirname, 'utils', 'preprocess.py');
-    
-    // Convert image path to absolute path
-    const absoluteImagePath = path.resolve(imagePath);
-    
-    // Use virtual environment Python (relative to project root)
-    const pythonPath = path.join(__dirname, 'venv', 'bin', 'python3');
-    
-    console.log(`📍 Python Path: ${pythonPath}`);
-    console.log(`📍 Script Path: ${scriptPath}`);
-    console.log(`📍 Image Path: ${absoluteImagePath}`);
-    
-    // Spawn Python process with venv Python
-    const pythonProcess = spawn(pythonPath, [scriptPath, absoluteImagePath]);
-    
-    let outputData = '';
-    let errorData = '';
-    
-    // Capture stdout (JSON output from Python)
-    pythonProcess.stdout.on('data', (data) => {
-      outputData += data.toString();
-    });
-    
-    // Capture stderr (error messages and Python warnings)
-    pythonProcess.stderr.on('data', (data) => {
-      errorData += data.toString();
-    });
-    
-    // Handle process completion
-    pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        console.error('❌ Python preprocessing error:', errorData);
-        return reject({
-          error: 'Preprocessing failed',
-          details: errorData,
-          exitCode: code
-        });
-      }
-      
-      try {
-        // Parse JSON output from Python script
-        const result = JSON.parse(outputData.trim());
-        console.log('✅ Preprocessing completed successfully');
-        resolve(result);
-      } catch (parseError) {
-        reject({
-          error: 'Failed to parse Python output',
-          output: outputData,
-          parseError: parseError.message
-        });
-      }
-    });
-    
-    // Handle spawn errors
-    pythonProcess.on('error', (error) => {
-      reject({
-        error: 'Failed to start Python process',
-        details: error.message,
-        hint: 'Make sure virtual environment exists at ./venv/'
-      });
-    });
-  });
-};
-
-// Helper function to run OCR on processed image
-const runOCR = (imagePath, language = 'eng') => {
-  return new Promise((resolve, reject) => {
-    // Get absolute path to the OCR script in utils folder
-    const scriptPath = path.join(__dirname, 'utils', 'ocr.py');
-    
-    // Convert image path to absolute path
-    const absoluteImagePath = path.resolve(imagePath);
-    
-    // Use virtual environment Python (relative to project root)
-    const pythonPath = path.join(__dirname, 'venv', 'bin', 'python3');
-    
-    console.log(`📍 Running OCR on: ${absoluteImagePath}`);
-    console.log(`📍 Language: ${language}`);
-    
-    // Spawn Python process with venv Python
-    const pythonProcess = spawn(pythonPath, [scriptPath, absoluteImagePath, language]);
-    
-    let outputData = '';
-    let errorData = '';
-    
-    // Capture stdout (JSON output from Python)
-    pythonProcess.stdout.on('data', (data) => {
-      outputData += data.toString();
-    });
-    
-    // Capture stderr (error messages and warnings)
-    pythonProcess.stderr.on('data', (data) => {
-      errorData += data.toString();
-    });
-    
-    // Handle process completion
-    pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        console.error('❌ OCR error:', errorData);
-        return reject({
-          error: 'OCR failed',
-          details: errorData,
-          exitCode: code
-        });
-      }
-      
-      try {
-        // Parse JSON output from Python script
-        const result = JSON.parse(outputData.trim());
-        console.log('✅ OCR completed successfully');
-        console.log(`📊 Extracted ${result.metadata?.word_count || 0} words`);
-        resolve(result);
-      } catch (parseError) {
-        reject({
-          error: 'Failed to parse OCR output',
-          output: outputData,
-          parseError: parseError.message
-        });
-      }
-    });
-    
-    // Handle spawn errors
-    pythonProcess.on('error', (error) => {
-      reject({
-        error: 'Failed to start OCR process',
-        details: error.message,
-        hint: 'Make sure virtual environment exists at ./venv/ and pytesseract is installed'
-      });
-    });
-  });
-};
+// Preprocessing and OCR jobs go through the persistent Python worker
+// (utils/pythonWorker.js), which spawns utils/worker.py once and keeps
+// OpenCV/Tesseract warm instead of paying interpreter + import startup
+// on every image. Both helpers resolve with the script's JSON result,
+// matching the contract of the old per-image spawn.
+const { runPreprocessing, runOCR } = require('./utils/pythonWorker');
 
 // Routes
 // Health check route
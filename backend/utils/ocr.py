@@ -10,21 +10,90 @@ import cv2
 import sys
 import os
 import json
+import numpy as np
 from pathlib import Path
 from PIL import Image
 
 # Configure Tesseract path for Apple Silicon (Homebrew)
 pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
 
+# orjson serializes several times faster than the stdlib json module
+# and emits bytes directly; optional, with a stdlib fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def extract_text_from_image(image_path, lang='eng'):
+
+def _print_json(obj):
+    """Write one JSON object to stdout, as bytes when orjson is present"""
+    # sys.stdout may be a redirected text stream with no .buffer (the
+    # persistent worker captures output with a StringIO), so only take
+    # the bytes path when one actually exists
+    if orjson is not None and hasattr(sys.stdout, "buffer"):
+        sys.stdout.buffer.write(orjson.dumps(obj) + b"\n")
+        sys.stdout.buffer.flush()
+    elif orjson is not None:
+        print(orjson.dumps(obj).decode(), flush=True)
+    else:
+        print(json.dumps(obj), flush=True)
+
+# tesserocr binds libtesseract in-process: the language model loads once
+# per process and text + word confidences come back from a single
+# recognition pass, instead of pytesseract forking the tesseract binary
+# twice (image_to_string + image_to_data) per image. Optional - we fall
+# back to pytesseract when it isn't installed.
+try:
+    import tesserocr
+    from tesserocr import PyTessBaseAPI, PSM, OEM
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+# Cached on first use - pytesseract answers get_tesseract_version() by
+# forking `tesseract --version`, which would cost a fork+exec on every
+# OCR call just to fill in metadata. Resolved lazily (not at import) so
+# a missing tesseract binary still surfaces as a normal JSON error.
+_tesseract_version = None
+
+
+def _get_tesseract_version():
+    """Get the Tesseract version string, forking the binary only once"""
+    global _tesseract_version
+    if _tesseract_version is None:
+        _tesseract_version = str(pytesseract.get_tesseract_version())
+    return _tesseract_version
+
+
+# One API instance per language, created lazily and reused across calls
+# so the trained-data model loads exactly once per worker process
+_tesserocr_apis = {}
+
+
+def _get_tesserocr_api(lang):
+    """Get (creating on first use) the shared in-process Tesseract API"""
+    api = _tesserocr_apis.get(lang)
+    if api is None:
+        # PSM.AUTO / OEM.DEFAULT match the '--oem 3 --psm 3' config used
+        # on the pytesseract path
+        api = PyTessBaseAPI(psm=PSM.AUTO, oem=OEM.DEFAULT, lang=lang)
+        _tesserocr_apis[lang] = api
+    return api
+
+
+def extract_text_from_image(image_path, lang='eng', preprocess_mode=None):
     """
     Extract text from an image using Tesseract OCR
-    
+
     Args:
         image_path (str): Path to the image file
         lang (str): Language code for OCR (default: 'eng')
-        
+        preprocess_mode (str): Optional preprocessing mode ('auto',
+            'standard', 'aggressive', 'minimal', 'receipt'). When set,
+            the image is preprocessed in-memory and the numpy array is
+            handed straight to Tesseract, skipping the JPEG encode +
+            decode round-trip of saving processed_*.jpg to disk first.
+
     Returns:
         dict: JSON object with extracted text and metadata
     """
@@ -32,32 +101,91 @@ def extract_text_from_image(image_path, lang='eng'):
         # Validate input file exists
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Image file not found: {image_path}")
-        
+
         # Read the image using OpenCV
         image = cv2.imread(image_path)
-        
+
         if image is None:
             # Try with PIL as fallback
             image = Image.open(image_path)
-        
-        # Perform OCR with custom configuration
-        # PSM 3 = Fully automatic page segmentation (default)
-        # OEM 3 = Default OCR Engine Mode (LSTM + Legacy)
-        custom_config = r'--oem 3 --psm 3'
-        
-        # Extract text
-        text = pytesseract.image_to_string(image, lang=lang, config=custom_config)
-        
-        # Get additional data (confidence scores, bounding boxes)
-        data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
-        
-        # Calculate average confidence
-        confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-        avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-        
-        # Count words
-        word_count = len([word for word in data['text'] if word.strip()])
-        
+            if preprocess_mode:
+                # Convert to a BGR array so preprocessing applies to
+                # formats OpenCV can't decode too
+                image = cv2.cvtColor(np.asarray(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+
+        if preprocess_mode:
+            # Preprocess in this process and OCR the array directly
+            from preprocess_advanced import (
+                auto_detect_mode,
+                preprocess_standard,
+                preprocess_aggressive,
+                preprocess_minimal,
+                preprocess_receipt
+            )
+
+            mode_functions = {
+                "standard": preprocess_standard,
+                "aggressive": preprocess_aggressive,
+                "minimal": preprocess_minimal,
+                "receipt": preprocess_receipt
+            }
+
+            if preprocess_mode == "auto":
+                # Detect from a reduced grayscale preview so the full
+                # BGR frame isn't converted a second time just for the
+                # brightness statistics
+                preview = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+                preprocess_mode = auto_detect_mode(preview if preview is not None else image)
+            elif preprocess_mode not in mode_functions:
+                # Normalize unknown names so the reported metadata
+                # matches the mode that actually runs
+                preprocess_mode = "standard"
+
+            image = mode_functions[preprocess_mode](image)
+
+        if TESSEROCR_AVAILABLE:
+            # In-process API: one recognition pass yields both the text
+            # and the per-word confidences
+            if not isinstance(image, Image.Image):
+                if image.ndim == 3:
+                    # OpenCV arrays are BGR
+                    image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+                else:
+                    image = Image.fromarray(image)
+
+            api = _get_tesserocr_api(lang)
+            api.SetImage(image)
+            text = api.GetUTF8Text()
+            word_confidences = api.AllWordConfidences()
+
+            confidences = [conf for conf in word_confidences if conf > 0]
+            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+            word_count = len(word_confidences)
+            tesseract_version = tesserocr.tesseract_version().splitlines()[0]
+        else:
+            # Perform OCR with custom configuration
+            # PSM 3 = Fully automatic page segmentation (default)
+            # OEM 3 = Default OCR Engine Mode (LSTM + Legacy)
+            custom_config = r'--oem 3 --psm 3'
+
+            # Extract text
+            text = pytesseract.image_to_string(image, lang=lang, config=custom_config)
+
+            # Get additional data (confidence scores, bounding boxes)
+            data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
+
+            # Calculate average confidence - vectorized, since the
+            # Python loop with an int() cast per word dominated on dense
+            # pages (float32 because image_to_data may report
+            # confidences as strings or floats depending on version)
+            conf = np.asarray(data['conf'], dtype=np.float32)
+            positive = conf[conf > 0]
+            avg_confidence = float(positive.mean()) if positive.size else 0
+
+            # Count words
+            word_count = sum(1 for word in data['text'] if word.strip())
+            tesseract_version = _get_tesseract_version()
+
         # Prepare result
         result = {
             "success": True,
@@ -67,12 +195,15 @@ def extract_text_from_image(image_path, lang='eng'):
                 "word_count": word_count,
                 "average_confidence": round(avg_confidence, 2),
                 "language": lang,
-                "tesseract_version": str(pytesseract.get_tesseract_version())
+                "tesseract_version": tesseract_version
             }
         }
-        
+
+        if preprocess_mode:
+            result["metadata"]["preprocessing_mode"] = preprocess_mode
+
         # Print JSON result to stdout
-        print(json.dumps(result))
+        _print_json(result)
         return result
         
     except FileNotFoundError as e:
@@ -81,7 +212,7 @@ def extract_text_from_image(image_path, lang='eng'):
             "error": "File not found",
             "message": str(e)
         }
-        print(json.dumps(error_result))
+        _print_json(error_result)
         sys.exit(1)
         
     except pytesseract.TesseractNotFoundError:
@@ -91,7 +222,7 @@ def extract_text_from_image(image_path, lang='eng'):
             "message": "Tesseract is not installed or not found at /opt/homebrew/bin/tesseract",
             "solution": "Install Tesseract using: brew install tesseract"
         }
-        print(json.dumps(error_result))
+        _print_json(error_result)
         sys.exit(1)
         
     except Exception as e:
@@ -101,7 +232,7 @@ def extract_text_from_image(image_path, lang='eng'):
             "message": str(e),
             "type": type(e).__name__
         }
-        print(json.dumps(error_result))
+        _print_json(error_result)
         sys.exit(1)
 
 
@@ -111,15 +242,16 @@ def main():
         error_result = {
             "success": False,
             "error": "Invalid arguments",
-            "message": "Usage: python3 ocr.py <image_path> [language]"
+            "message": "Usage: python3 ocr.py <image_path> [language] [preprocess_mode]"
         }
-        print(json.dumps(error_result))
+        _print_json(error_result)
         sys.exit(1)
-    
+
     image_path = sys.argv[1]
     language = sys.argv[2] if len(sys.argv) > 2 else 'eng'
-    
-    extract_text_from_image(image_path, language)
+    preprocess_mode = sys.argv[3] if len(sys.argv) > 3 else None
+
+    extract_text_from_image(image_path, language, preprocess_mode)
 
 
 if __name__ == "__main__":
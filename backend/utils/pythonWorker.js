@@ -0,0 +1,121 @@
+// Persistent Python worker bridge
+// Spawns utils/worker.py once and reuses it for all preprocessing and
+// OCR jobs, instead of paying ~300-500ms of interpreter + OpenCV import
+// startup for a fresh python3 per image. Jobs are sent as newline-
+// delimited JSON on stdin; replies come back on stdout tagged with the
+// job id so concurrent requests can be matched up.
+
+const { spawn } = require('child_process');
+const path = require('path');
+
+let workerProcess = null;
+let stdoutBuffer = '';
+let nextJobId = 1;
+const pendingJobs = new Map();
+
+// Reject every in-flight job (used when the worker dies or fails to start)
+const failAllPending = (reason) => {
+  for (const job of pendingJobs.values()) {
+    job.reject(reason);
+  }
+  pendingJobs.clear();
+};
+
+// Spawn the worker on first use; respawn lazily if it has exited
+const ensureWorker = () => {
+  if (workerProcess) {
+    return workerProcess;
+  }
+
+  const scriptPath = path.join(__dirname, 'worker.py');
+
+  // Use virtual environment Python (relative to the backend folder)
+  const pythonPath = path.join(__dirname, '..', 'venv', 'bin', 'python3');
+
+  console.log(`🐍 Starting persistent Python worker: ${scriptPath}`);
+  workerProcess = spawn(pythonPath, [scriptPath]);
+
+  // Replies arrive as one JSON object per line; chunks may split lines
+  workerProcess.stdout.on('data', (data) => {
+    stdoutBuffer += data.toString();
+
+    let newlineIndex;
+    while ((newlineIndex = stdoutBuffer.indexOf('\n')) !== -1) {
+      const line = stdoutBuffer.slice(0, newlineIndex).trim();
+      stdoutBuffer = stdoutBuffer.slice(newlineIndex + 1);
+
+      if (!line) {
+        continue;
+      }
+
+      let result;
+      try {
+        result = JSON.parse(line);
+      } catch (parseError) {
+        console.error('❌ Unparseable Python worker reply:', line);
+        continue;
+      }
+
+      const job = pendingJobs.get(result.id);
+      if (job) {
+        pendingJobs.delete(result.id);
+        job.resolve(result);
+      }
+    }
+  });
+
+  workerProcess.stderr.on('data', (data) => {
+    console.error(`🐍 Python worker: ${data.toString().trim()}`);
+  });
+
+  workerProcess.on('error', (error) => {
+    failAllPending({
+      error: 'Failed to start Python worker',
+      details: error.message,
+      hint: 'Make sure virtual environment exists at ./venv/'
+    });
+    workerProcess = null;
+    stdoutBuffer = '';
+  });
+
+  workerProcess.on('exit', (code) => {
+    failAllPending({
+      error: 'Python worker exited unexpectedly',
+      exitCode: code
+    });
+    workerProcess = null;
+    stdoutBuffer = '';
+  });
+
+  return workerProcess;
+};
+
+// Submit one job to the worker and wait for its tagged reply.
+// Resolves with the script's parsed JSON result (callers check the
+// success flag, as they did with the per-image spawn).
+const runJob = (job) => {
+  return new Promise((resolve, reject) => {
+    const id = `job-${nextJobId++}`;
+    pendingJobs.set(id, { resolve, reject });
+    ensureWorker().stdin.write(JSON.stringify({ id, ...job }) + '\n');
+  });
+};
+
+// Helper function to run Python preprocessing
+const runPreprocessing = (imagePath) => {
+  return runJob({
+    action: 'preprocess',
+    path: path.resolve(imagePath)
+  });
+};
+
+// Helper function to run OCR on processed image
+const runOCR = (imagePath, language = 'eng') => {
+  return runJob({
+    action: 'ocr',
+    path: path.resolve(imagePath),
+    lang: language
+  });
+};
+
+module.exports = { runPreprocessing, runOCR };
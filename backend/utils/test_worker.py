@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Round-trip tests for the persistent worker (worker.py)
+
+Spawns the real worker process, pipes it JSON jobs and checks that every
+job gets a tagged JSON reply - including failure cases, where a lost
+reply would leave the Node caller waiting forever. With orjson installed
+these tests also cover the bytes-vs-captured-stdout reply path.
+
+Run with: python3 -m pytest backend/utils/test_worker.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+_WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+
+
+@pytest.fixture
+def worker():
+    proc = subprocess.Popen(
+        [sys.executable, _WORKER],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    yield proc
+    proc.stdin.close()
+    proc.wait(timeout=30)
+
+
+def _round_trip(proc, job):
+    """Send one job and read back its reply line"""
+    proc.stdin.write(json.dumps(job) + "\n")
+    proc.stdin.flush()
+    line = proc.stdout.readline()
+    assert line, "worker closed stdout without replying"
+    return json.loads(line)
+
+
+def test_unknown_action_replies_with_tagged_error(worker):
+    reply = _round_trip(worker, {"id": "job-1", "action": "bogus"})
+    assert reply["id"] == "job-1"
+    assert reply["success"] is False
+    assert reply["error"] == "Unknown action"
+
+
+def test_ocr_failure_replies_instead_of_hanging(worker, tmp_path):
+    # The OCR job path needs the imaging stack importable in the pool
+    pytest.importorskip("cv2")
+    pytest.importorskip("pytesseract")
+
+    missing = str(tmp_path / "missing.png")
+    reply = _round_trip(worker, {"id": "job-2", "action": "ocr", "path": missing})
+    assert reply["id"] == "job-2"
+    assert reply["success"] is False
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+DocuMind Persistent Worker
+Long-lived process that replaces one-python3-per-image invocation
+
+Node spawns this worker once and pipes newline-delimited JSON jobs to
+stdin; each job is dispatched to a multiprocessing.Pool whose workers
+keep OpenCV and Tesseract imported (warm) between jobs. This removes the
+~300-500 ms interpreter + cv2 import startup previously paid per image
+and lets preprocessing run in parallel across cores.
+
+Job format (one JSON object per line on stdin):
+    {"id": "req-1", "action": "ocr", "path": "uploads/img.png", "lang": "eng"}
+    {"id": "req-2", "action": "preprocess", "path": "uploads/img.png"}
+    {"id": "req-3", "action": "preprocess_advanced", "path": "uploads/img.png", "mode": "auto"}
+
+Each result is written to stdout as one JSON line with the job's "id"
+echoed back, so Node can match replies to requests.
+"""
+
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+
+# orjson serializes several times faster than the stdlib json module
+# and emits bytes directly; optional, with a stdlib fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _init():
+    """
+    Pool worker initializer - imports the heavy dependencies once per
+    worker and pins OpenCV to a single thread so pool-level parallelism
+    doesn't oversubscribe the machine.
+    """
+    try:
+        import cv2
+        cv2.setNumThreads(1)
+        import pytesseract  # noqa: F401 - imported to warm the module
+    except ImportError:
+        # Don't kill the pool worker here - let the import error surface
+        # as a per-job JSON error reply instead
+        pass
+
+
+def _run_job(action, args):
+    """
+    Execute one job inside a pool worker.
+
+    The underlying script functions print their JSON result to stdout and
+    call sys.exit(1) on failure (they were written as one-shot CLIs), so
+    capture stdout and rely on their return value / printed error JSON.
+    """
+    try:
+        if action == "ocr":
+            from ocr import extract_text_from_image as fn
+        elif action == "preprocess":
+            from preprocess import preprocess_image as fn
+        elif action == "preprocess_advanced":
+            from preprocess_advanced import preprocess_image as fn
+        else:
+            return {
+                "success": False,
+                "error": "Unknown action",
+                "message": f"Unsupported action: {action}"
+            }
+
+        captured = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(captured):
+                return fn(*args)
+        except SystemExit as e:
+            # The function already printed its error JSON before exiting.
+            # Never re-raise here: multiprocessing.Pool doesn't catch
+            # SystemExit in its task wrapper, so re-raising would kill
+            # this pool worker and the job's reply would never be sent.
+            output = captured.getvalue().strip()
+            if output:
+                try:
+                    return json.loads(output.splitlines()[-1])
+                except json.JSONDecodeError:
+                    pass
+            return {
+                "success": False,
+                "error": "Job exited",
+                "message": f"Job exited with code {e.code} without a JSON result"
+            }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": "Worker job failed",
+            "message": str(e),
+            "type": type(e).__name__
+        }
+
+
+# Serializes result lines written back to Node
+_stdout_lock = threading.Lock()
+
+
+def _reply(job_id, result):
+    """Write one JSON result line to stdout, tagged with the job id"""
+    result = dict(result)
+    result["id"] = job_id
+    with _stdout_lock:
+        if orjson is not None:
+            sys.stdout.buffer.write(orjson.dumps(result) + b"\n")
+            sys.stdout.buffer.flush()
+        else:
+            print(json.dumps(result), flush=True)
+
+
+def main():
+    """Read JSON jobs from stdin until EOF, dispatching to the pool"""
+    # Make the sibling scripts importable inside pool workers
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    processes = max(1, (os.cpu_count() or 2) - 1)
+    pool = mp.Pool(processes=processes, initializer=_init)
+
+    print(f"Worker ready with {processes} processes", file=sys.stderr)
+
+    try:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                _reply(None, {
+                    "success": False,
+                    "error": "Invalid job",
+                    "message": f"Failed to parse job JSON: {e}"
+                })
+                continue
+
+            job_id = job.get("id")
+            action = job.get("action", "ocr")
+
+            if action == "ocr":
+                args = (job.get("path"), job.get("lang", "eng"))
+            elif action == "preprocess_advanced":
+                args = (job.get("path"), job.get("mode", "auto"))
+            else:
+                args = (job.get("path"),)
+
+            pool.apply_async(
+                _run_job,
+                (action, args),
+                callback=lambda result, job_id=job_id: _reply(job_id, result)
+            )
+    finally:
+        pool.close()
+        pool.join()
+
+
+if __name__ == "__main__":
+    main()